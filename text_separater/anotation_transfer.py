@@ -2,6 +2,12 @@ from __future__ import annotations
 from fast_antx.core import transfer
 
 
+ANNOTATIONS = [
+    ["author_start", r"(\<[𰵀-󴉱]?au)"],
+    ["author_end", r"(\>)"],
+]
+
+
 def run_antx_transfer_test() -> None:
 
     source_text = (
@@ -20,12 +26,8 @@ def run_antx_transfer_test() -> None:
         "༄༅། །གྲུབ་བརྒྱའི་སྤྱི་མེས་མར་མི་དྭགས་གསུམ་ནས། །དཔལ་"
         "ལྡན་དུས་གསུམ་མཁྱེན་པའི་བཀའ་བརྒྱུད་ནི།\n"
     )
-    annotations = [
-        ["author_start", r"(\<[𰵀-󴉱]?au)"],
-        ["author_end", r"(\>)"],
-    ]
 
-    result = transfer(source_text, annotations, target_text, output="txt")
+    result = transfer(source_text, ANNOTATIONS, target_text, output="txt")
     print(result)
 
     expected_snippet = "<𰵀auམཛད་པ་པོ། འཇམ་མགོན་ཀོང་སྤྲུལ་བློ་གྲོས་མཐའ་ཡས། །>"
@@ -3,44 +3,88 @@ import argparse
 import json
 import os
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 DEFAULT_BASE_URL = "https://api-aq25662yyq-uc.a.run.app"
 
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as handle:
+            return orjson.loads(handle.read())
     with open(path, "r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
+def dump_json_bytes(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return (json.dumps(payload, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
 def write_json(path: Optional[str], payload: Any) -> None:
+    data = dump_json_bytes(payload)
     if path:
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, indent=2)
-            handle.write("\n")
+        with open(path, "wb") as handle:
+            handle.write(data)
     else:
-        json.dump(payload, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write("\n")
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
 
 
 def ensure_list(data: Any) -> List[Any]:
-    if isinstance(data, list):
+    kind = type(data)
+    if kind is list:
         return data
-    if isinstance(data, dict) and "items" in data and isinstance(data["items"], list):
-        return data["items"]
+    if kind is dict:
+        items = data.get("items")
+        if type(items) is list:
+            return items
     return [data]
 
 
+def iter_plan(path: str) -> Iterator[Any]:
+    if ijson is None:
+        yield from ensure_list(load_json(path))
+        return
+    with open(path, "rb") as handle:
+        head = handle.read(1)
+        while head.isspace():
+            head = handle.read(1)
+        if head == b"[":
+            handle.seek(0)
+            yield from ijson.items(handle, "item", use_float=True)
+            return
+    yield from ensure_list(load_json(path))
+
+
 def fetch_text_by_bdrc(
     session: requests.Session,
-    base_url: str,
+    texts_url: str,
     bdrc: str,
     timeout: int,
 ) -> Tuple[bool, Optional[Dict[str, Any]], int]:
-    url = f"{base_url.rstrip('/')}/v2/texts/{bdrc}"
+    url = f"{texts_url}/{bdrc}"
     response = session.get(url, timeout=timeout)
     if response.status_code == 200:
         return True, response.json(), response.status_code
@@ -69,6 +113,12 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--base-url", default=os.getenv("TEXT_API_BASE_URL", DEFAULT_BASE_URL))
     parser.add_argument("--timeout", type=int, default=60)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=32,
+        help="Number of concurrent BDRC lookups.",
+    )
     parser.add_argument("--output", help="Write results JSON to this path.")
     return parser.parse_args()
 
@@ -81,26 +131,25 @@ def main() -> None:
             raise SystemExit(f"Missing {text_path}.")
         return [{"text": load_json(text_path)}]
 
-    upload_plan: List[Dict[str, Any]] = []
+    upload_plan: Iterable[Dict[str, Any]] = []
     if args.input:
-        upload_plan = ensure_list(load_json(args.input))
+        upload_plan = iter_plan(args.input)
     elif args.all:
         input_root = args.input_root
         if not os.path.isdir(input_root):
             raise SystemExit(f"Missing input root directory: {input_root}")
-        for entry in sorted(os.listdir(input_root)):
-            folder_path = os.path.join(input_root, entry)
-            if not os.path.isdir(folder_path):
-                continue
-            upload_plan.extend(load_plan_from_folder(folder_path))
+        folder_plans: List[Dict[str, Any]] = []
+        with os.scandir(input_root) as it:
+            folders = sorted((entry for entry in it if entry.is_dir()), key=lambda e: e.name)
+        for entry in folders:
+            folder_plans.extend(load_plan_from_folder(entry.path))
+        upload_plan = folder_plans
     elif args.input_folder:
         upload_plan = load_plan_from_folder(args.input_folder)
     else:
         raise SystemExit("Provide --input, --input-folder, or --all with --input-root.")
 
-    session = requests.Session()
-
-    results: List[Dict[str, Any]] = []
+    checks: List[Tuple[int, str]] = []
     for idx, item in enumerate(upload_plan):
         if not isinstance(item, dict):
             raise SystemExit(f"Item {idx} must be a JSON object.")
@@ -110,11 +159,32 @@ def main() -> None:
         bdrc = text_payload.get("bdrc")
         if not bdrc:
             raise SystemExit(f"Item {idx} missing required 'bdrc' in text.")
+        checks.append((idx, bdrc))
 
-        exists, metadata, status = fetch_text_by_bdrc(
-            session, args.base_url, bdrc, args.timeout
-        )
+    texts_url = f"{args.base_url.rstrip('/')}/v2/texts"
+    workers = max(1, args.workers)
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=workers,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    def check(bdrc: str) -> Tuple[bool, Optional[Dict[str, Any]], int]:
+        return fetch_text_by_bdrc(session, texts_url, bdrc, args.timeout)
 
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        fetched = list(executor.map(check, [bdrc for _, bdrc in checks]))
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    results: List[Dict[str, Any]] = []
+    for (idx, bdrc), (exists, metadata, status) in zip(checks, fetched):
         results.append(
             {
                 "index": idx,
@@ -3,38 +3,61 @@ import argparse
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_INVALID_CHARS_RE = re.compile(r"[\\/:\*\?\"<>\|]")
+_WS_RE = re.compile(r"\s+")
+_TITLE_KEYS = ("bo", "en", "zh")
+_UNKNOWN = frozenset({"unknown", "unk"})
+_IN_COPYRIGHT = frozenset({"in copyright", "in-copyright"})
+_PUBLIC_DOMAIN = frozenset({"public domain", "public_domain", "public-domain"})
+
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as handle:
+            return orjson.loads(handle.read())
     with open(path, "r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
+def dump_json_bytes(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return (json.dumps(payload, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
 def write_json(path: str, payload: Any) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
-        handle.write("\n")
+    with open(path, "wb") as handle:
+        handle.write(dump_json_bytes(payload))
 
 
 def sanitize_folder_name(name: str) -> str:
-    cleaned = name.strip()
-    cleaned = re.sub(r"[\\/:\*\?\"<>\|]", "_", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned)
+    cleaned = _INVALID_CHARS_RE.sub("_", name.strip())
+    cleaned = _WS_RE.sub(" ", cleaned)
     return cleaned or "untitled"
 
 
 def pick_title_value(incipit_title: Any) -> Optional[str]:
-    if isinstance(incipit_title, str):
+    if type(incipit_title) is str:
         return incipit_title
-    if isinstance(incipit_title, dict):
-        for key in ("bo", "en", "zh"):
-            if key in incipit_title and incipit_title[key]:
-                return incipit_title[key]
-        for value in incipit_title.values():
+    if type(incipit_title) is dict:
+        for key in _TITLE_KEYS:
+            value = incipit_title.get(key)
             if value:
                 return value
+        return next((value for value in incipit_title.values() if value), None)
     return None
 
 
@@ -87,21 +110,21 @@ def build_translation_payload(entry: Dict[str, Any], fallback_title: str) -> Dic
 
     author = None
     contributions = metadata.get("contributions") or []
-    if isinstance(contributions, list):
+    if type(contributions) is list:
         for contrib in contributions:
-            if isinstance(contrib, dict) and contrib.get("person_id"):
+            if type(contrib) is dict and contrib.get("person_id"):
                 author = {"person_id": contrib["person_id"]}
                 break
 
     segmentation = [
         {"span": span["span"]}
         for span in entry.get("segment_annotation", [])
-        if isinstance(span, dict) and "span" in span
+        if type(span) is dict and "span" in span
     ]
     target_annotation = [
         {"span": {"start": span["start"], "end": span["end"]}, "index": idx}
         for idx, span in enumerate(entry.get("target_annotation", []))
-        if isinstance(span, dict) and "start" in span and "end" in span
+        if type(span) is dict and "start" in span and "end" in span
     ]
     alignment_annotation = [
         {
@@ -110,7 +133,7 @@ def build_translation_payload(entry: Dict[str, Any], fallback_title: str) -> Dic
             "alignment_index": [idx],
         }
         for idx, span in enumerate(entry.get("alignment_annotation", []))
-        if isinstance(span, dict) and "start" in span and "end" in span
+        if type(span) is dict and "start" in span and "end" in span
     ]
 
     payload: Dict[str, Any] = {
@@ -142,6 +165,12 @@ def parse_args() -> argparse.Namespace:
         default=os.path.join(os.getcwd(), "input_json"),
         help="Directory to write API input JSON files.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes used to build payloads.",
+    )
     return parser.parse_args()
 
 
@@ -149,52 +178,66 @@ def normalize_copyright(value: Any) -> Any:
     if not isinstance(value, str):
         return value
     cleaned = value.strip().lower()
-    if cleaned in {"unknown", "unk"}:
+    if cleaned in _UNKNOWN:
         return "Unknown"
-    if cleaned in {"in copyright", "in-copyright"}:
+    if cleaned in _IN_COPYRIGHT:
         return "In copyright"
-    if cleaned in {"public domain", "public_domain", "public-domain"}:
+    if cleaned in _PUBLIC_DOMAIN:
         return "Public domain"
     return value
 
 
+def build_folder_payloads(
+    source_path: str,
+) -> Optional[Tuple[str, Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]]:
+    data = load_json(source_path)
+
+    root_texts = data.get("root_texts") or []
+    translations = data.get("translations") or []
+    if not root_texts:
+        return None
+
+    base_title = os.path.splitext(os.path.basename(source_path))[0].strip()
+    root_entry = root_texts[0]
+    root_meta = root_entry.get("metadata", {})
+    incipit_title_value = pick_title_value(root_meta.get("incipit_title")) or base_title
+    folder_name = sanitize_folder_name(incipit_title_value)
+
+    text_payload = build_text_payload(root_meta, base_title)
+    instance_payload = build_instance_payload(root_entry)
+    translation_payloads = [
+        build_translation_payload(translation, base_title)
+        for translation in translations
+    ]
+    return folder_name, text_payload, instance_payload, translation_payloads
+
+
 def main() -> None:
     args = parse_args()
     source_dir = args.source_dir
     output_dir = args.output_dir
 
-    for filename in os.listdir(source_dir):
-        if not filename.lower().endswith(".json"):
-            continue
-        source_path = os.path.join(source_dir, filename)
-        data = load_json(source_path)
-
-        root_texts = data.get("root_texts") or []
-        translations = data.get("translations") or []
-        if not root_texts:
-            continue
-
-        base_title = os.path.splitext(filename)[0].strip()
-        root_entry = root_texts[0]
-        root_meta = root_entry.get("metadata", {})
-        incipit_title_value = pick_title_value(root_meta.get("incipit_title")) or base_title
-        folder_name = sanitize_folder_name(incipit_title_value)
-        folder_path = os.path.join(output_dir, folder_name)
-
-        text_payload = build_text_payload(root_meta, base_title)
-        instance_payload = build_instance_payload(root_entry)
-        translation_payloads = [
-            build_translation_payload(translation, base_title)
-            for translation in translations
-        ]
-
-        write_json(os.path.join(folder_path, "text_metadata.json"), text_payload)
-        write_json(os.path.join(folder_path, "instance_payload.json"), instance_payload)
-        if translation_payloads:
-            write_json(
-                os.path.join(folder_path, "translation_payloads.json"),
-                translation_payloads,
-            )
+    with os.scandir(source_dir) as it:
+        source_paths = [entry.path for entry in it if entry.name.lower().endswith(".json")]
+    workers = max(1, args.workers)
+    chunksize = max(1, len(source_paths) // (workers * 4))
+
+    # Payloads are built in worker processes but written here, in listing
+    # order, because several source files can map to the same folder.
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for built in executor.map(build_folder_payloads, source_paths, chunksize=chunksize):
+            if built is None:
+                continue
+            folder_name, text_payload, instance_payload, translation_payloads = built
+            folder_path = os.path.join(output_dir, folder_name)
+
+            write_json(os.path.join(folder_path, "text_metadata.json"), text_payload)
+            write_json(os.path.join(folder_path, "instance_payload.json"), instance_payload)
+            if translation_payloads:
+                write_json(
+                    os.path.join(folder_path, "translation_payloads.json"),
+                    translation_payloads,
+                )
 
 
 if __name__ == "__main__":
@@ -4,36 +4,64 @@ import json
 import os
 import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import colorama
 import requests
 from colorama import Fore, Style
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 ID_KEYS = ("id", "text_id", "textId", "instance_id", "instanceId")
 DEFAULT_BASE_URL = "https://api-aq25662yyq-uc.a.run.app"
+TEXT_PRESERVE_EMPTY_LIST_KEYS = frozenset({"contributions"})
 
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as handle:
+            return orjson.loads(handle.read())
     with open(path, "r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
+def dump_json_bytes(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return (json.dumps(payload, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
 def write_json(path: Optional[str], payload: Any) -> None:
+    data = dump_json_bytes(payload)
     if path:
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, indent=2)
-            handle.write("\n")
+        with open(path, "wb") as handle:
+            handle.write(data)
     else:
-        json.dump(payload, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write("\n")
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
 
 
 def write_json_file(path: str, payload: Any) -> None:
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
-        handle.write("\n")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(dump_json_bytes(payload))
+    os.replace(tmp_path, path)
 
 
 def log(message: str) -> None:
@@ -42,33 +70,49 @@ def log(message: str) -> None:
 
 
 def ensure_list(data: Any) -> List[Any]:
-    if isinstance(data, list):
+    kind = type(data)
+    if kind is list:
         return data
-    if isinstance(data, dict) and "items" in data and isinstance(data["items"], list):
-        return data["items"]
+    if kind is dict:
+        items = data.get("items")
+        if type(items) is list:
+            return items
     return [data]
 
 
+def iter_plan(path: str) -> Iterator[Any]:
+    if ijson is None:
+        yield from ensure_list(load_json(path))
+        return
+    with open(path, "rb") as handle:
+        head = handle.read(1)
+        while head.isspace():
+            head = handle.read(1)
+        if head == b"[":
+            handle.seek(0)
+            yield from ijson.items(handle, "item", use_float=True)
+            return
+    yield from ensure_list(load_json(path))
+
+
 def extract_id(value: Any) -> Optional[str]:
-    if isinstance(value, str):
-        return value
-    if isinstance(value, dict):
-        if "$oid" in value and isinstance(value["$oid"], str):
-            return value["$oid"]
-        for key in ID_KEYS:
-            if key in value:
-                found = extract_id(value[key])
-                if found:
-                    return found
-        for child in value.values():
-            found = extract_id(child)
-            if found:
-                return found
-    if isinstance(value, list):
-        for child in value:
-            found = extract_id(child)
-            if found:
-                return found
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        kind = type(current)
+        if kind is str:
+            if current:
+                return current
+        elif kind is dict:
+            oid = current.get("$oid")
+            if type(oid) is str:
+                if oid:
+                    return oid
+                continue
+            stack.extend(reversed(list(current.values())))
+            stack.extend(current[key] for key in reversed(ID_KEYS) if key in current)
+        elif kind is list:
+            stack.extend(reversed(current))
     return None
 
 
@@ -80,23 +124,21 @@ def build_auth_header(token: Optional[str], header: str, scheme: str) -> Dict[st
     return {header: token}
 
 
-def flatten_content(value: Any) -> List[str]:
-    if value is None:
-        return []
-    if isinstance(value, str):
-        return [value]
-    if isinstance(value, list):
-        parts: List[str] = []
-        for item in value:
-            parts.extend(flatten_content(item))
-        return parts
-    raise ValueError("Content must be a string or array of strings.")
-
-
 def normalize_content(value: Any) -> str:
-    if isinstance(value, str):
+    if type(value) is str:
         return value
-    parts = [part for part in flatten_content(value) if part is not None]
+    parts: List[str] = []
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if current is None:
+            continue
+        if type(current) is str:
+            parts.append(current)
+        elif type(current) is list:
+            stack.extend(reversed(current))
+        else:
+            raise ValueError("Content must be a string or array of strings.")
     return "\n".join(parts)
 
 
@@ -149,7 +191,11 @@ def post_json(
                 summary[key] = summarize_value(value)
         return summary
 
-    response = session.post(url, json=payload, timeout=timeout)
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response = session.post(url, data=body, timeout=timeout)
     try:
         response.raise_for_status()
     except requests.HTTPError as exc:
@@ -185,38 +231,51 @@ def build_instance_payload(
     return payload
 
 
-def clean_metadata(value: Any, preserve_empty_list_keys: Optional[set] = None) -> Any:
-    if isinstance(value, dict):
+def clean_metadata(value: Any, preserve_empty_list_keys: frozenset) -> Any:
+    kind = type(value)
+    if kind is dict:
         cleaned: Dict[str, Any] = {}
         for key, item in value.items():
-            if isinstance(item, str) and not item.strip():
+            item_kind = type(item)
+            if item_kind is dict or item_kind is list:
+                item = clean_metadata(item, preserve_empty_list_keys)
+                if not item:
+                    if item_kind is list and key in preserve_empty_list_keys:
+                        cleaned[key] = item
+                    continue
+            elif item is None or (item_kind is str and not item.strip()):
                 continue
-            cleaned_item = clean_metadata(item, preserve_empty_list_keys)
-            if cleaned_item is None:
-                continue
-            if isinstance(cleaned_item, dict) and not cleaned_item:
-                continue
-            if isinstance(cleaned_item, list) and not cleaned_item:
-                if preserve_empty_list_keys and key in preserve_empty_list_keys:
-                    cleaned[key] = cleaned_item
-                continue
-            cleaned[key] = cleaned_item
+            cleaned[key] = item
         return cleaned
-    if isinstance(value, list):
+    if kind is list:
         items = []
         for item in value:
-            cleaned_item = clean_metadata(item, preserve_empty_list_keys)
-            if cleaned_item is None:
-                continue
-            if isinstance(cleaned_item, dict) and not cleaned_item:
+            item_kind = type(item)
+            if item_kind is dict or item_kind is list:
+                item = clean_metadata(item, preserve_empty_list_keys)
+                if not item:
+                    continue
+            elif item is None:
                 continue
-            if isinstance(cleaned_item, list) and not cleaned_item:
-                continue
-            items.append(cleaned_item)
+            items.append(item)
         return items
     return value
 
 
+def clean_payloads(
+    item: Dict[str, Any],
+    default_instance_metadata: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    text_payload = clean_metadata(item["text"], TEXT_PRESERVE_EMPTY_LIST_KEYS)
+    instance_payload = build_instance_payload(item, default_instance_metadata)
+    if "metadata" in instance_payload:
+        instance_payload = {
+            **instance_payload,
+            "metadata": clean_metadata(instance_payload["metadata"], frozenset()),
+        }
+    return text_payload, instance_payload
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Upload text metadata and content.")
     parser.add_argument("--input", help="Path to upload plan JSON.")
@@ -258,6 +317,9 @@ def main() -> None:
     args = parse_args()
     if not args.base_url:
         raise SystemExit("Missing --base-url or TEXT_API_BASE_URL.")
+    if args.start < 0 or (args.limit is not None and args.limit < 0):
+        raise SystemExit("--start and --limit must be non-negative.")
+    text_url = f"{args.base_url.rstrip('/')}/v2/texts"
 
     def load_plan_from_folder(folder_path: str) -> List[Dict[str, Any]]:
         text_path = os.path.join(folder_path, "text_metadata.json")
@@ -274,16 +336,17 @@ def main() -> None:
             }
         ]
 
-    def attach_instance_id(folder_path: str, instance_id: str) -> None:
+    def attach_instance_id(item: Dict[str, Any], instance_id: str) -> None:
+        folder_path = item["_folder"]
         instance_path = os.path.join(folder_path, "instance_payload.json")
-        if os.path.exists(instance_path):
-            payload = load_json(instance_path)
-            if not isinstance(payload, dict):
-                raise SystemExit(f"Expected an object in {instance_path}.")
-            payload_without_id = {key: value for key, value in payload.items() if key != "instance_id"}
-            updated_payload = {"instance_id": instance_id, **payload_without_id}
-            write_json_file(instance_path, updated_payload)
-            log(f"Wrote instance_id to {instance_path}")
+        payload = item.get("instance")
+        if not isinstance(payload, dict):
+            raise SystemExit(f"Expected an object in {instance_path}.")
+        payload_without_id = {key: value for key, value in payload.items() if key != "instance_id"}
+        updated_payload = {"instance_id": instance_id, **payload_without_id}
+        write_json_file(instance_path, updated_payload)
+        item["instance"] = updated_payload
+        log(f"Wrote instance_id to {instance_path}")
 
         translation_path = os.path.join(folder_path, "translation_payloads.json")
         if not os.path.exists(translation_path):
@@ -301,18 +364,19 @@ def main() -> None:
         write_json_file(translation_path, updated)
         log(f"Wrote instance_id to {translation_path}")
 
-    upload_plan: List[Dict[str, Any]] = []
+    upload_plan: Iterable[Dict[str, Any]] = []
     if args.input:
-        upload_plan = ensure_list(load_json(args.input))
+        upload_plan = iter_plan(args.input)
     elif args.all:
         input_root = args.input_root
         if not os.path.isdir(input_root):
             raise SystemExit(f"Missing input root directory: {input_root}")
-        for entry in sorted(os.listdir(input_root)):
-            folder_path = os.path.join(input_root, entry)
-            if not os.path.isdir(folder_path):
-                continue
-            upload_plan.extend(load_plan_from_folder(folder_path))
+        folder_plans: List[Dict[str, Any]] = []
+        with os.scandir(input_root) as it:
+            folders = sorted((entry for entry in it if entry.is_dir()), key=lambda e: e.name)
+        for entry in folders:
+            folder_plans.extend(load_plan_from_folder(entry.path))
+        upload_plan = folder_plans
     elif args.input_folder:
         upload_plan = load_plan_from_folder(args.input_folder)
     else:
@@ -343,22 +407,38 @@ def main() -> None:
         **build_auth_header(args.token, args.auth_header, args.auth_scheme),
     }
     session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=1,
+        # Never resend a POST once it may have reached the server: only
+        # connect errors are retried.
+        max_retries=Retry(total=3, read=False, other=0, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    known_bdrc: Dict[str, bool] = {}
+
     def bdrc_exists(bdrc: str) -> bool:
         if cached_bdrc is not None:
             return bdrc in cached_bdrc
-        url = f"{args.base_url.rstrip('/')}/v2/texts/{bdrc}"
+        if bdrc in known_bdrc:
+            return known_bdrc[bdrc]
+        url = f"{text_url}/{bdrc}"
         response = session.get(url, timeout=args.timeout)
         if response.status_code == 200:
-            return True
-        if response.status_code == 404:
-            return False
-        response.raise_for_status()
-        return False
+            exists = True
+        elif response.status_code == 404:
+            exists = False
+        else:
+            response.raise_for_status()
+            exists = False
+        known_bdrc[bdrc] = exists
+        return exists
 
 
-    items = upload_plan[args.start :]
-    if args.limit is not None:
-        items = items[: args.limit]
+    stop = None if args.limit is None else args.start + args.limit
+    items = islice(upload_plan, args.start, stop)
 
     results: List[Dict[str, Any]] = []
     for idx, item in enumerate(items, start=args.start):
@@ -367,10 +447,7 @@ def main() -> None:
         if "text" not in item or not isinstance(item["text"], dict):
             raise SystemExit(f"Item {idx} must include a 'text' object.")
 
-        text_payload = clean_metadata(item["text"], preserve_empty_list_keys={"contributions"})
-        instance_payload = build_instance_payload(item, default_instance_metadata)
-        if "metadata" in instance_payload:
-            instance_payload["metadata"] = clean_metadata(instance_payload["metadata"])
+        text_payload, instance_payload = clean_payloads(item, default_instance_metadata)
         bdrc_value = text_payload.get("bdrc")
         folder_label = item.get("_folder") or "plan"
         log(f"[{idx}] Starting upload for {folder_label}")
@@ -390,13 +467,14 @@ def main() -> None:
                 )
                 continue
 
-        text_url = f"{args.base_url.rstrip('/')}/v2/texts"
         text_response, text_raw = post_json(
             session, text_url, text_payload, args.timeout, args.dry_run
         )
         text_id = extract_id(text_response) if text_response is not None else None
         if text_id:
             log(f"[{idx}] Text created: {text_id}")
+            if bdrc_value:
+                known_bdrc[bdrc_value] = True
 
         instance_url = None
         instance_response = None
@@ -412,9 +490,8 @@ def main() -> None:
                 session, instance_url, instance_payload, args.timeout, args.dry_run
             )
             instance_id = extract_id(instance_response)
-            folder_path = item.get("_folder")
-            if instance_id and folder_path:
-                attach_instance_id(folder_path, instance_id)
+            if instance_id and item.get("_folder"):
+                attach_instance_id(item, instance_id)
             if instance_id:
                 log(f"[{idx}] Instance created: {instance_id}")
 
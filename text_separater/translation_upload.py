@@ -4,62 +4,115 @@ import json
 import os
 import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import colorama
 import requests
 from colorama import Fore, Style
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 DEFAULT_BASE_URL = "https://api-aq25662yyq-uc.a.run.app"
+_STRIP_KEYS = ("segmentation", "target_annotation", "alignment_annotation")
 
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as handle:
+            return orjson.loads(handle.read())
     with open(path, "r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
+def dump_json_bytes(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return (json.dumps(payload, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def dump_json_line(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
 def write_json(path: Optional[str], payload: Any) -> None:
+    data = dump_json_bytes(payload)
     if path:
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, indent=2)
-            handle.write("\n")
+        with open(path, "wb") as handle:
+            handle.write(data)
     else:
-        json.dump(payload, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write("\n")
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
 
 
 def log(message: str) -> None:
     sys.stderr.write(f"{Style.BRIGHT}{Fore.CYAN}{message}{Style.RESET_ALL}\n")
-    sys.stderr.flush()
 
 
 def ensure_list(data: Any) -> List[Any]:
-    if isinstance(data, list):
+    kind = type(data)
+    if kind is list:
         return data
-    if isinstance(data, dict) and "items" in data and isinstance(data["items"], list):
-        return data["items"]
+    if kind is dict:
+        items = data.get("items")
+        if type(items) is list:
+            return items
     return [data]
 
 
+def iter_plan(path: str) -> Iterator[Any]:
+    if ijson is None:
+        yield from ensure_list(load_json(path))
+        return
+    with open(path, "rb") as handle:
+        head = handle.read(1)
+        while head.isspace():
+            head = handle.read(1)
+        if head == b"[":
+            handle.seek(0)
+            yield from ijson.items(handle, "item", use_float=True)
+            return
+    yield from ensure_list(load_json(path))
+
+
 def flatten_content(value: Any) -> List[str]:
-    if value is None:
-        return []
-    if isinstance(value, str):
-        return [value]
-    if isinstance(value, list):
-        parts: List[str] = []
-        for item in value:
-            parts.extend(flatten_content(item))
-        return parts
-    raise ValueError("Content must be a string or array of strings.")
+    parts: List[str] = []
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if current is None:
+            continue
+        if type(current) is str:
+            parts.append(current)
+        elif type(current) is list:
+            stack.extend(reversed(current))
+        else:
+            raise ValueError("Content must be a string or array of strings.")
+    return parts
 
 
 def normalize_content(value: Any) -> str:
-    if isinstance(value, str):
+    if type(value) is str:
         return value
-    parts = [part for part in flatten_content(value) if part is not None]
-    return "\n".join(parts)
+    return "\n".join(flatten_content(value))
 
 
 def post_json(
@@ -71,7 +124,11 @@ def post_json(
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     if dry_run:
         return None, None
-    response = session.post(url, json=payload, timeout=timeout)
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response = session.post(url, data=body, timeout=timeout)
     try:
         response.raise_for_status()
     except requests.HTTPError as exc:
@@ -89,21 +146,46 @@ def build_translation_payload(
     strip_annotations: bool,
     author_person_id: Optional[str],
 ) -> Dict[str, Any]:
-    if "translation" in item and isinstance(item["translation"], dict):
+    if "translation" in item and type(item["translation"]) is dict:
         payload = item["translation"]
     else:
-        payload = {k: v for k, v in item.items() if k != "instance_id"}
+        payload = item.copy()
+        payload.pop("instance_id", None)
     if "content" in payload:
         payload["content"] = normalize_content(payload["content"])
     if strip_annotations:
-        payload.pop("segmentation", None)
-        payload.pop("target_annotation", None)
-        payload.pop("alignment_annotation", None)
+        for key in _STRIP_KEYS:
+            payload.pop(key, None)
     if author_person_id and "author" not in payload:
         payload["author"] = {"person_id": author_person_id}
     return payload
 
 
+def prepare_jobs(
+    items: Iterable[Any],
+    start: int,
+    args: argparse.Namespace,
+) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    for idx, item in enumerate(items, start=start):
+        if not isinstance(item, dict):
+            raise SystemExit(f"Item {idx} must be a JSON object.")
+        instance_id = item.get("instance_id")
+        if not instance_id:
+            if args.skip_missing_instance_id:
+                log(f"[{idx}] Skipping (missing instance_id)")
+                continue
+            raise SystemExit(f"Item {idx} missing required 'instance_id'.")
+
+        payload = build_translation_payload(
+            item,
+            args.strip_annotations,
+            args.author_person_id,
+        )
+        if "content" not in payload:
+            raise SystemExit(f"Item {idx} missing required 'content'.")
+        yield idx, instance_id, payload
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Upload translations for instances.")
     parser.add_argument("--input", required=True, help="Path to translations JSON.")
@@ -126,63 +208,134 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip items missing instance_id instead of failing.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=32,
+        help="Number of translations uploaded in parallel (ignored when --sleep-seconds is set).",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Upload one translation at a time (same as --concurrency 1).",
+    )
     parser.add_argument("--dry-run", action="store_true")
-    parser.add_argument("--output", help="Write results JSON to this path.")
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument("--output", help="Write results JSON to this path.")
+    output_group.add_argument(
+        "--output-jsonl",
+        help="Stream results to this path as JSON Lines instead of keeping them in memory.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     colorama.init(autoreset=True)
     args = parse_args()
-    translations = ensure_list(load_json(args.input))
+    if args.start < 0 or (args.limit is not None and args.limit < 0):
+        raise SystemExit("--start and --limit must be non-negative.")
+    translations = iter_plan(args.input)
 
+    instances_url = f"{args.base_url.rstrip('/')}/v2/instances"
+    if args.sequential or args.sleep_seconds:
+        concurrency = 1
+    else:
+        concurrency = max(1, args.concurrency)
     session = requests.Session()
-    session.headers.update({"Content-Type": "application/json"})
-
-    items = translations[args.start :]
-    if args.limit is not None:
-        items = items[: args.limit]
+    session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=concurrency,
+        # Translation POSTs create data, so only replay them when the request
+        # never reached the server (connect errors) or was refused (429/503).
+        # Read and other mid-request errors are raised instead of resent.
+        max_retries=Retry(
+            total=5,
+            read=False,
+            other=0,
+            backoff_factor=0.3,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
-    results: List[Dict[str, Any]] = []
-    for idx, item in enumerate(items, start=args.start):
-        if not isinstance(item, dict):
-            raise SystemExit(f"Item {idx} must be a JSON object.")
-        instance_id = item.get("instance_id")
-        if not instance_id:
-            if args.skip_missing_instance_id:
-                log(f"[{idx}] Skipping (missing instance_id)")
-                continue
-            raise SystemExit(f"Item {idx} missing required 'instance_id'.")
+    stop = None if args.limit is None else args.start + args.limit
+    items = islice(translations, args.start, stop)
 
+    def upload_one(job: Tuple[int, str, Dict[str, Any]]) -> Dict[str, Any]:
+        idx, instance_id, payload = job
         log(f"[{idx}] Uploading translation for instance {instance_id}")
-        payload = build_translation_payload(
-            item,
-            args.strip_annotations,
-            args.author_person_id,
-        )
-        if "content" not in payload:
-            raise SystemExit(f"Item {idx} missing required 'content'.")
-
-        url = f"{args.base_url.rstrip('/')}/v2/instances/{instance_id}/translation"
+        url = f"{instances_url}/{instance_id}/translation"
         response_json, response_raw = post_json(
             session, url, payload, args.timeout, args.dry_run
         )
         if response_json is not None:
             log(f"[{idx}] Translation uploaded")
 
-        results.append(
-            {
-                "index": idx,
-                "instance_id": instance_id,
-                "response": response_json,
-                "payload": payload if args.dry_run else None,
-            }
-        )
-
         if args.sleep_seconds:
             time.sleep(args.sleep_seconds)
 
-    write_json(args.output, results)
+        return {
+            "index": idx,
+            "instance_id": instance_id,
+            "response": response_json,
+            "payload": payload if args.dry_run else None,
+        }
+
+    results: List[Dict[str, Any]] = []
+    jsonl_handle = open(args.output_jsonl, "wb") if args.output_jsonl else None
+
+    def record(result: Dict[str, Any]) -> None:
+        if jsonl_handle is not None:
+            jsonl_handle.write(dump_json_line(result))
+        else:
+            results.append(result)
+
+    def record_finished(futures: List["Future[Dict[str, Any]]"]) -> None:
+        uploaded: List[int] = []
+        for future in futures:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            result = future.result()
+            record(result)
+            uploaded.append(result["index"])
+        if uploaded:
+            log(f"Uploaded after the failing item, do not re-upload: {uploaded}")
+
+    jobs = prepare_jobs(items, args.start, args)
+    try:
+        if concurrency == 1:
+            for job in jobs:
+                record(upload_one(job))
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+            try:
+                while True:
+                    batch = list(islice(jobs, concurrency * 4))
+                    if not batch:
+                        break
+                    futures = [executor.submit(upload_one, job) for job in batch]
+                    for position, future in enumerate(futures):
+                        try:
+                            result = future.result()
+                        except BaseException:
+                            executor.shutdown(cancel_futures=True)
+                            record_finished(futures[position + 1 :])
+                            raise
+                        record(result)
+            finally:
+                executor.shutdown(cancel_futures=True)
+    finally:
+        # Written even when an upload fails, so completed uploads are on
+        # record before the error propagates.
+        if jsonl_handle is not None:
+            jsonl_handle.close()
+        else:
+            write_json(args.output, results)
 
 
 if __name__ == "__main__":